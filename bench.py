@@ -0,0 +1,298 @@
+# Нагрузочный бенчмарк обработчиков: заполняет отдельную базу синтетическими данными, прогоняет
+# через настоящий Application сценарии N одновременных пользователей (каталог, корзина, оформление
+# заказа, поиск, управление заказами) и печатает JSON с пропускной способностью и p50/p95/p99
+# по каждому обработчику. Bot API подменён офлайн-транспортом: сеть не используется.
+# Запуск: python bench.py --products 100000 --cart-rows 1000000 --orders 500000 --users 200 --output bench.json
+# С --database-url postgresql://... те же данные после заполнения копируются в PostgreSQL (таблицы магазина
+# там перезаписываются), и прогон идёт на нём — отчёты двух хранилищ сравниваются напрямую.
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+CATEGORIES = ('📿 Джайнамазы', '🕋 Тасбихи', '📚 Книги', '🎁 Подарки', '👗 Для женщин', '👔 Для мужчин')
+NAME_WORDS = ('Тасбих', 'Коран', 'Книга', 'Джайнамаз', 'Подарок', 'Хиджаб', 'Духи', 'Ковёр', 'Чётки', 'Мисвак')
+SEARCH_QUERIES = ('тасб', 'коран', 'книга нам', 'джай', 'подар', 'хидж', 'ковер')
+PAYMENT_METHODS = ("💳 Оплата картой", "💰 Оплата наличными", "📱 Элсом", "🏦 М-Банк")
+ADDRESSES = ("Бишкек, ул. Киевская 1", "Ош, ул. Ленина 5", "Бишкек, мкр. Джал 12")
+CHUNK = 10000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Handler-level load test for the shop bot")
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--cart-rows', type=int, default=20000)
+    parser.add_argument('--orders', type=int, default=10000)
+    parser.add_argument('--users', type=int, default=50, help="concurrent simulated users")
+    parser.add_argument('--sessions', type=int, default=5, help="click paths per user")
+    parser.add_argument('--latency', type=float, default=0.0, help="simulated Bot API round-trip, seconds")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--db', help="database file to seed (default: temporary file)")
+    parser.add_argument('--database-url', help="run against PostgreSQL at this URL instead of the SQLite file")
+    parser.add_argument('--output', help="write the JSON report here instead of stdout")
+    return parser.parse_args()
+
+
+def seed_database(path, products, cart_rows, orders, rng):
+    # Импорт main откладывается до выбора базы, поэтому миграции берём из отдельного соединения
+    import main
+
+    conn = sqlite3.connect(path, isolation_level=None)
+    try:
+        main.migrate(conn)
+        conn.execute("BEGIN")
+        rows = (
+            (CATEGORIES[i % len(CATEGORIES)], None,
+             f"{rng.choice(NAME_WORDS)} {rng.choice(NAME_WORDS).lower()} №{i}",
+             rng.randrange(300, 8000, 50), 0 if rng.random() < 0.25 else 1000000,
+             f"https://example.com/photos/{i}.jpg" if i % 4 == 0 else None)
+            for i in range(products)
+        )
+        for chunk in iter(lambda: list(itertools.islice(rows, CHUNK)), []):
+            conn.executemany(
+                "INSERT INTO products (category, gender, name, price, in_stock, photo) VALUES (?, ?, ?, ?, ?, ?)",
+                chunk
+            )
+
+        # Корзины синтетических покупателей (id от 10^9, чтобы не пересечься с участниками прогона)
+        per_user = max(1, min(20, products))
+        cart = ((10 ** 9 + i // per_user, 1 + (i * 7919 + i // per_user) % products, 1 + i % 3)
+                for i in range(cart_rows))
+        for chunk in iter(lambda: list(itertools.islice(cart, CHUNK)), []):
+            conn.executemany("INSERT OR IGNORE INTO cart (user_id, product_id, quantity) VALUES (?, ?, ?)", chunk)
+
+        statuses = ('pending', 'confirmed', 'shipped', 'completed', 'cancelled')
+        order_rows = (
+            (10 ** 9 + i, f"Покупатель {i}", "+996 555 000 000", f"Товар x1 = {price} сом", price,
+             rng.choice(PAYMENT_METHODS), rng.choice(ADDRESSES), statuses[i % len(statuses)],
+             f"2025-{1 + i % 12:02d}-{1 + i % 28:02d} 12:00:00")
+            for i, price in ((i, rng.randrange(500, 20000, 50)) for i in range(orders))
+        )
+        for chunk in iter(lambda: list(itertools.islice(order_rows, CHUNK)), []):
+            conn.executemany("""
+                INSERT INTO orders (user_id, user_name, user_phone, products, total_price, payment_method,
+                                    delivery_address, status, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, chunk)
+        conn.execute("COMMIT")
+        conn.execute("PRAGMA optimize")
+    finally:
+        conn.close()
+
+
+class UpdateFactory:
+    # Синтетические обновления в формате Bot API, разобранные так же, как настоящие
+    def __init__(self, bot):
+        self.bot = bot
+        self._ids = itertools.count(1)
+
+    def _user(self, user_id):
+        return {'id': user_id, 'is_bot': False, 'first_name': f'User{user_id}'}
+
+    def _message(self, user_id, text):
+        message = {
+            'message_id': next(self._ids),
+            'date': int(time.time()),
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': self._user(user_id),
+            'text': text,
+        }
+        if text.startswith('/'):
+            message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+        return message
+
+    def text(self, user_id, text):
+        from telegram import Update
+        return Update.de_json({'update_id': next(self._ids), 'message': self._message(user_id, text)}, self.bot)
+
+    def callback(self, user_id, data):
+        from telegram import Update
+        return Update.de_json({
+            'update_id': next(self._ids),
+            'callback_query': {
+                'id': str(next(self._ids)),
+                'from': self._user(user_id),
+                'chat_instance': str(user_id),
+                'data': data,
+                'message': self._message(user_id, "…"),
+            },
+        }, self.bot)
+
+
+def next_page_data(category):
+    import main
+    page = main.get_catalog_page(category)
+    buttons = [button for row in page.keyboard.inline_keyboard for button in row] if page.keyboard else []
+    return [button.callback_data for button in buttons if button.callback_data.startswith('p:')]
+
+
+def click_paths(rng, user_id, admin_id, orders):
+    # Реалистичные сценарии: в основном просмотр, реже корзина, оформление, поиск и работа админа
+    import main
+    categories = [c for c in main.catalog.categories()] or [main.ALL_PRODUCTS]
+
+    def products_to_add(category):
+        in_stock = [p for p in main.catalog.products_in(category) if p.in_stock > 0]
+        return [f"c:{p.id}" for p in rng.sample(in_stock, min(len(in_stock), rng.randint(1, 3)))]
+
+    def browse():
+        category = rng.choice(categories)
+        steps = [('text', "/start"), ('text', "📿 Каталог"), ('text', category)]
+        steps += [('callback', data) for data in next_page_data(category)[:1]]
+        steps += [('callback', data) for data in products_to_add(category)]
+        steps.append(('text', "🛒 Корзина"))
+        return user_id, steps
+
+    def checkout():
+        category = rng.choice(categories)
+        steps = [('text', category)]
+        steps += [('callback', data) for data in products_to_add(category)]
+        steps += [('text', "🛒 Корзина"), ('text', "💳 Оформить заказ"), ('text', rng.choice(PAYMENT_METHODS)),
+                  ('text', "+996 555 123 456"), ('text', rng.choice(ADDRESSES))]
+        return user_id, steps
+
+    def search():
+        return user_id, [('text', f"/search {rng.choice(SEARCH_QUERIES)}"), ('text', main.ALL_PRODUCTS)]
+
+    def admin():
+        steps = [('text', "👑 Админ-панель"), ('text', "📦 Управление заказами"), ('text', "📊 Статистика")]
+        if orders:
+            action = rng.choice(('confirm', 'ship', 'complete'))
+            steps.append(('callback', f"{action}_{rng.randint(1, orders)}"))
+        return admin_id, steps
+
+    scenarios = (browse, checkout, search, admin)
+    return rng.choices(scenarios, weights=(60, 20, 15, 5))[0]()
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(q / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def summarize(samples, elapsed):
+    values = sorted(samples)
+    return {
+        'count': len(values),
+        'throughput_per_s': round(len(values) / elapsed, 2) if elapsed else None,
+        'mean_ms': round(sum(values) / len(values) * 1000, 3),
+        'p50_ms': round(percentile(values, 50) * 1000, 3),
+        'p95_ms': round(percentile(values, 95) * 1000, 3),
+        'p99_ms': round(percentile(values, 99) * 1000, 3),
+        'max_ms': round(values[-1] * 1000, 3),
+    }
+
+
+def summarize_handlers(histogram, elapsed):
+    # Время обработчиков берётся из метрик бота (main.HANDLER_SECONDS, по маршруту для текстовых
+    # кнопок), а не повторным замером: перцентили — оценка по корзинам гистограммы, максимума в ней нет
+    report = {}
+    for label_values, (count, total) in sorted(histogram.series().items()):
+        report[label_values[0]] = {
+            'count': count,
+            'throughput_per_s': round(count / elapsed, 2) if elapsed else None,
+            'mean_ms': round(total / count * 1000, 3),
+            'p50_ms': round(histogram.quantile(0.50, *label_values) * 1000, 3),
+            'p95_ms': round(histogram.quantile(0.95, *label_values) * 1000, 3),
+            'p99_ms': round(histogram.quantile(0.99, *label_values) * 1000, 3),
+        }
+    return report
+
+
+async def run(args, db_path):
+    import main
+    from offline_bot import OFFLINE_TOKEN, RecordingRequest
+
+    request = RecordingRequest(latency=args.latency)
+    application = main.build_application(OFFLINE_TOKEN, request)
+    update_times = []
+    factory = UpdateFactory(application.bot)
+    admin_id = main.ADMIN_IDS[0]
+
+    await application.initialize()
+    await application.post_init(application)
+    request.reset()
+    try:
+        async def user_session(user_id):
+            user_rng = random.Random(args.seed * 100003 + user_id)
+            for _ in range(args.sessions):
+                actor, steps = click_paths(user_rng, user_id, admin_id, args.orders)
+                for kind, payload in steps:
+                    update = factory.text(actor, payload) if kind == 'text' else factory.callback(actor, payload)
+                    started = time.perf_counter()
+                    # Тот же путь, что и у обновлений из polling/webhook: через PerUserUpdateProcessor
+                    await application.update_processor.process_update(update, application.process_update(update))
+                    update_times.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user_session(user_id) for user_id in range(1, args.users + 1)))
+        elapsed = time.perf_counter() - started
+        # Сессии, оставшиеся в памяти после прогона, и их размер
+        sessions = main.sessions.report()
+    finally:
+        await application.post_shutdown(application)
+        await application.shutdown()
+
+    return {
+        'config': {
+            'products': args.products, 'cart_rows': args.cart_rows, 'orders': args.orders, 'users': args.users,
+            'sessions': args.sessions, 'latency_s': args.latency, 'seed': args.seed,
+            'update_concurrency': main.UPDATE_CONCURRENCY, 'db_pool_size': main.DB_POOL_SIZE,
+            'storage': type(main.storage).__name__,
+        },
+        'environment': {
+            'python': platform.python_version(), 'sqlite': sqlite3.sqlite_version, 'platform': platform.platform(),
+        },
+        'elapsed_s': round(elapsed, 3),
+        'updates': summarize(update_times, elapsed),
+        'handlers': summarize_handlers(main.HANDLER_SECONDS, elapsed),
+        'bot_api_calls': dict(sorted(request.counts.items())),
+        'sessions': sessions,
+    }
+
+
+def bench():
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db or os.path.join(tmp, 'bench.db')
+        # main читает путь к базе при импорте
+        os.environ['SHOP_DB'] = db_path
+        if args.database_url:
+            os.environ['DATABASE_URL'] = args.database_url
+        # Виртуальные пользователи кликают без пауз — лимитер флуда отклонил бы почти всё
+        os.environ.setdefault('FLOOD_USER_RATE', '0')
+        # Обработка фото в замер не входит: пул процессов и скачивание фото по URL шли бы фоном
+        os.environ['IMAGE_WORKERS'] = '0'
+        import logging
+        logging.disable(logging.INFO)
+
+        started = time.perf_counter()
+        seed_database(db_path, args.products, args.cart_rows, args.orders, random.Random(args.seed))
+        if args.database_url:
+            from migrate_to_postgres import copy_database
+            asyncio.run(copy_database(db_path, args.database_url, replace=True))
+        seeded = time.perf_counter() - started
+
+        report = asyncio.run(run(args, db_path))
+        report['seed_s'] = round(seeded, 3)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    sys.exit(bench())
@@ -0,0 +1,61 @@
+# Проверка планов горячих запросов: применяет миграции к копии базы и падает,
+# если какой-либо запрос обработчиков перешёл на полное сканирование таблицы.
+# Запуск: python check_query_plans.py [путь к базе]
+# С DATABASE_URL=postgresql://... проверяются планы PostgreSQL в этой базе (схема применяется, данные не меняются)
+import asyncio
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+
+import main
+
+
+def check(db_path):
+    with tempfile.TemporaryDirectory() as tmp:
+        copy_path = os.path.join(tmp, 'shop.db')
+        if os.path.exists(db_path):
+            shutil.copyfile(db_path, copy_path)
+
+        conn = sqlite3.connect(copy_path, isolation_level=None)
+        try:
+            main.migrate(conn)
+            for name, (sql, params) in main.HOT_QUERIES.items():
+                print(f"{name}:")
+                for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params):
+                    print(f"    {row[-1]}")
+            problems = main.find_table_scans(conn)
+        finally:
+            conn.close()
+
+    for name, detail in problems:
+        print(f"FAIL {name}: {detail}")
+    return not problems
+
+
+async def check_postgres(url):
+    store = main.PostgresStorage(url, size=1)
+    await store.open()
+    try:
+        async with store.pool.acquire() as conn:
+            plans = await main.explain_postgres(conn)
+    finally:
+        await store.close()
+
+    for name, lines in plans.items():
+        print(f"{name}:")
+        for line in lines:
+            print(f"    {line}")
+    problems = main.postgres_table_scans(plans)
+    for name, detail in problems:
+        print(f"FAIL {name}: {detail}")
+    return not problems
+
+
+if __name__ == '__main__':
+    if main.DATABASE_URL:
+        ok = asyncio.run(check_postgres(main.DATABASE_URL))
+    else:
+        ok = check(sys.argv[1] if len(sys.argv) > 1 else main.DB_NAME)
+    sys.exit(0 if ok else 1)
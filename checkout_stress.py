@@ -0,0 +1,85 @@
+# Нагрузочная проверка оформления заказов: сотни покупателей одновременно оформляют
+# товар с маленьким остатком. Заказов должно получиться ровно столько, сколько было
+# на складе, остаток не должен уйти в минус, а корзины проигравших — остаться на месте.
+# Запуск: python checkout_stress.py [покупателей] [остаток]
+# С DATABASE_URL=postgresql://... та же проверка идёт на PostgreSQL: подготовленная база SQLite
+# копируется туда (таблицы магазина в целевой базе перезаписываются)
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import main
+
+
+async def stress(db_path, buyers, stock):
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        main.migrate(conn)
+        product_id = conn.execute(
+            "INSERT INTO products (category, gender, name, price, in_stock, photo) VALUES (?, ?, ?, ?, ?, ?)",
+            ('books', None, 'Стресс-тест', 500, stock, None)
+        ).lastrowid
+        conn.executemany("INSERT INTO cart (user_id, product_id, quantity) VALUES (?, ?, 1)",
+                         [(user_id, product_id) for user_id in range(1, buyers + 1)])
+    finally:
+        conn.close()
+
+    writer = None
+    if main.DATABASE_URL:
+        from migrate_to_postgres import copy_database
+
+        await copy_database(db_path, main.DATABASE_URL, replace=True)
+        store = main.PostgresStorage(main.DATABASE_URL)
+    else:
+        writer = main.CheckoutWriter(db_path)
+        store = main.SQLiteStorage(main.Database(db_path), writer)
+
+    await store.open()
+    started = time.perf_counter()
+    try:
+        results = await asyncio.gather(*(
+            store.place_order(user_id, f'Покупатель {user_id}', '+996 000 000 000', 'Наличными', 'Бишкек')
+            for user_id in range(1, buyers + 1)
+        ))
+        elapsed = time.perf_counter() - started
+
+        counts = []
+        for sql in (f"SELECT in_stock FROM products WHERE id={product_id}", "SELECT COUNT(*) FROM orders",
+                    "SELECT COUNT(*) FROM cart", "SELECT COUNT(*) FROM outbox"):
+            if writer is None:
+                counts.append(await store.pool.fetchval(sql))
+            else:
+                counts.append((await store.db.fetchone(sql))[0])
+        left, orders, carts, notifications = counts
+    finally:
+        await store.close()
+
+    placed = sum(1 for result in results if result.order_id is not None)
+    rejected = sum(1 for result in results if result.unavailable)
+    commits = f", {writer.commits} commits" if writer else ""
+    print(f"{buyers} checkouts in {elapsed:.2f}s{commits}: "
+          f"{placed} placed, {rejected} out of stock, {left} left")
+
+    problems = []
+    if placed != stock or orders != stock:
+        problems.append(f"expected {stock} orders, got {placed} results / {orders} rows")
+    if left != 0:
+        problems.append(f"expected stock 0, got {left}")
+    if rejected != buyers - stock or carts != buyers - stock:
+        problems.append(f"expected {buyers - stock} rejected carts, got {rejected} results / {carts} rows")
+    if notifications != stock * len(main.ADMIN_IDS):
+        problems.append(f"expected {stock * len(main.ADMIN_IDS)} admin notifications, got {notifications}")
+    for problem in problems:
+        print(f"FAIL {problem}")
+    return not problems
+
+
+if __name__ == '__main__':
+    buyers = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    stock = int(sys.argv[2]) if len(sys.argv) > 2 else 7
+    with tempfile.TemporaryDirectory() as tmp:
+        ok = asyncio.run(stress(os.path.join(tmp, 'shop.db'), buyers, stock))
+    sys.exit(0 if ok else 1)
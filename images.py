@@ -0,0 +1,66 @@
+# Обработка фото товаров: выполняется в отдельных процессах (ProcessPoolExecutor в main.py),
+# поэтому здесь только чистые функции верхнего уровня — их можно передать в дочерний процесс.
+# OpenCV и numpy импортируются при первом вызове: основному процессу они не нужны.
+import hashlib
+
+CATALOG_MAX_SIDE = 1280
+CATALOG_QUALITY = 82
+THUMB_MAX_SIDE = 320
+THUMB_QUALITY = 75
+
+
+class ImageError(ValueError):
+    pass
+
+
+def _fit(cv2, image, max_side):
+    height, width = image.shape[:2]
+    scale = max_side / max(height, width)
+    if scale >= 1:
+        return image
+    # INTER_AREA даёт самое чистое уменьшение без муара
+    return cv2.resize(image, (max(1, round(width * scale)), max(1, round(height * scale))),
+                      interpolation=cv2.INTER_AREA)
+
+
+def _encode_jpeg(cv2, image, quality):
+    ok, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality, cv2.IMWRITE_JPEG_OPTIMIZE, 1])
+    if not ok:
+        raise ImageError("не удалось сжать изображение")
+    return buffer.tobytes()
+
+
+def perceptual_hash(cv2, np, image):
+    # pHash: DCT уменьшенной серой копии, 64 бита — знаки низких частот относительно медианы.
+    # Пересжатие, изменение размера и лёгкая цветокоррекция меняют хэш лишь на несколько бит.
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].flatten()
+    bits = low > np.median(low[1:])
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return f"{value:016x}"
+
+
+def hamming_distance(a, b):
+    return (int(a, 16) ^ int(b, 16)).bit_count()
+
+
+def process_image(data):
+    # bytes исходника -> (sha256 исходника, pHash, ширина, высота, JPEG каталога, JPEG миниатюры)
+    import cv2
+    import numpy as np
+
+    content_hash = hashlib.sha256(data).hexdigest()
+    # IMREAD_COLOR применяет поворот из EXIF, так что ориентация нормализуется при декодировании;
+    # прозрачность и оттенки серого приводятся к трём каналам BGR
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ImageError("файл не является изображением")
+
+    catalog = _fit(cv2, image, CATALOG_MAX_SIDE)
+    thumb = _fit(cv2, catalog, THUMB_MAX_SIDE)
+    height, width = catalog.shape[:2]
+    return (content_hash, perceptual_hash(cv2, np, image), width, height,
+            _encode_jpeg(cv2, catalog, CATALOG_QUALITY), _encode_jpeg(cv2, thumb, THUMB_QUALITY))
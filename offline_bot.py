@@ -0,0 +1,94 @@
+# Офлайн-транспорт для Bot API: ничего не отправляет в Telegram, а записывает вызовы
+# и возвращает правдоподобные ответы. Нужен для локальной проверки webhook-режима,
+# бенчмарков и воспроизведения записанных обновлений.
+import asyncio
+import itertools
+import json
+import time
+from collections import Counter, deque
+
+from telegram.request import BaseRequest
+
+OFFLINE_TOKEN = '123456:OFFLINE'
+OFFLINE_BOT_USER = {'id': 123456, 'is_bot': True, 'first_name': 'Nazif.store', 'username': 'nazif_store_bot'}
+
+# Методы, которые возвращают отправленное сообщение
+MESSAGE_METHODS = {
+    'sendMessage', 'sendPhoto', 'sendDocument', 'editMessageText', 'editMessageCaption',
+    'editMessageReplyMarkup', 'editMessageMedia', 'copyMessage', 'forwardMessage',
+}
+
+
+class RecordingRequest(BaseRequest):
+    def __init__(self, record_limit=1000, latency=0.0):
+        self.counts = Counter()
+        self.calls = deque(maxlen=record_limit)
+        # Искусственная задержка ответа, чтобы имитировать сетевой round-trip
+        self.latency = latency
+        self._ids = itertools.count(1)
+
+    @property
+    def read_timeout(self):
+        return None
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    def reset(self):
+        self.counts.clear()
+        self.calls.clear()
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None, write_timeout=None,
+                         connect_timeout=None, pool_timeout=None):
+        api_method = url.rsplit('/', 1)[-1]
+        params = request_data.parameters if request_data else {}
+        self.counts[api_method] += 1
+        self.calls.append((time.monotonic(), api_method, params))
+
+        if api_method == 'getUpdates':
+            # Обновлений нет: ждём, как long polling, но недолго
+            await asyncio.sleep(min(float(params.get('timeout') or 0), 1.0))
+        elif self.latency:
+            await asyncio.sleep(self.latency)
+
+        return 200, json.dumps({'ok': True, 'result': self._result(api_method, params)}).encode()
+
+    def _message(self, params, with_photo=False):
+        message_id = next(self._ids)
+        chat_id = params.get('chat_id') or OFFLINE_BOT_USER['id']
+        message = {
+            'message_id': params.get('message_id') or message_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': OFFLINE_BOT_USER,
+        }
+        if with_photo:
+            message['photo'] = [{'file_id': f'offline-photo-{message_id}', 'file_unique_id': f'op{message_id}',
+                                 'width': 320, 'height': 320}]
+            if params.get('caption'):
+                message['caption'] = params['caption']
+        elif params.get('text'):
+            message['text'] = params['text']
+        return message
+
+    def _result(self, api_method, params):
+        if api_method == 'getMe':
+            return OFFLINE_BOT_USER
+        if api_method == 'getUpdates':
+            return []
+        if api_method == 'sendMediaGroup':
+            media = params.get('media')
+            if isinstance(media, str):
+                media = json.loads(media)
+            return [self._message(dict(params, caption=item.get('caption')), with_photo=True) for item in media]
+        if api_method in MESSAGE_METHODS:
+            if params.get('inline_message_id'):
+                return True
+            return self._message(params, with_photo=api_method == 'sendPhoto')
+        if api_method == 'getFile':
+            file_id = params.get('file_id')
+            return {'file_id': file_id, 'file_unique_id': f'of{file_id}', 'file_path': f'offline/{file_id}'}
+        return True
@@ -0,0 +1,151 @@
+# Воспроизведение записанных обновлений (UPDATE_LOG=updates.jsonl python main.py) на копии базы
+# с офлайн-ботом: в записанном темпе (--speed 1), ускоренно (--speed 10) или так быстро, как
+# получится (--speed 0). Печатает JSON-отчёт в том же формате, что и bench.py, чтобы сравнивать
+# прогоны до и после изменения.
+# Запуск: python replay.py updates.jsonl --db shop.db --speed 0 --output replay.json
+# С --database-url postgresql://... копия базы переносится в PostgreSQL и воспроизведение идёт на нём.
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+from bench import summarize, summarize_handlers
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Replay recorded updates against a copy of the shop database")
+    parser.add_argument('log', help="JSONL file written with UPDATE_LOG")
+    parser.add_argument('--db', default=os.environ.get('SHOP_DB', 'shop.db'), help="database to copy")
+    parser.add_argument('--speed', type=float, default=0.0,
+                        help="1 = recorded pace, 10 = ten times faster, 0 = as fast as possible")
+    parser.add_argument('--limit', type=int, help="replay only the first N updates")
+    parser.add_argument('--latency', type=float, default=0.0, help="simulated Bot API round-trip, seconds")
+    parser.add_argument('--database-url', help="replay against PostgreSQL at this URL (its shop tables are replaced)")
+    parser.add_argument('--output', help="write the JSON report here instead of stdout")
+    return parser.parse_args()
+
+
+def read_log(path, limit=None):
+    records = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Последняя строка могла оборваться, если бот остановили во время записи
+                continue
+            records.append((record['t'], record['update']))
+            if limit and len(records) >= limit:
+                break
+    return records
+
+
+async def replay(args, records):
+    import main
+    from offline_bot import OFFLINE_TOKEN, RecordingRequest
+    from telegram import Update
+
+    request = RecordingRequest(latency=args.latency)
+    application = main.build_application(OFFLINE_TOKEN, request)
+    update_times = []
+
+    await application.initialize()
+    await application.post_init(application)
+    request.reset()
+    lag = []
+    try:
+        async def feed(update):
+            started = time.perf_counter()
+            await application.update_processor.process_update(update, application.process_update(update))
+            update_times.append(time.perf_counter() - started)
+
+        tasks = []
+        first_t = records[0][0] if records else 0.0
+        started = time.perf_counter()
+        for t, data in records:
+            if args.speed > 0:
+                # Ждём момента, когда обновление пришло в записи (с учётом ускорения)
+                due = (t - first_t) / args.speed
+                delay = due - (time.perf_counter() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                lag.append(max(0.0, -delay))
+            # Обновления подаются в порядке записи; порядок внутри одного пользователя
+            # сохраняет PerUserUpdateProcessor, как и в боевом режиме
+            tasks.append(asyncio.create_task(feed(Update.de_json(data, application.bot))))
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+    finally:
+        await application.post_shutdown(application)
+        await application.shutdown()
+
+    recorded_span = records[-1][0] - records[0][0] if records else 0.0
+    return {
+        'config': {
+            'log': args.log, 'db': args.db, 'speed': args.speed, 'limit': args.limit, 'latency_s': args.latency,
+            'update_concurrency': main.UPDATE_CONCURRENCY, 'db_pool_size': main.DB_POOL_SIZE,
+            'storage': type(main.storage).__name__,
+        },
+        'environment': {
+            'python': platform.python_version(), 'sqlite': sqlite3.sqlite_version, 'platform': platform.platform(),
+        },
+        'recorded_span_s': round(recorded_span, 3),
+        'elapsed_s': round(elapsed, 3),
+        'max_feed_lag_ms': round(max(lag) * 1000, 3) if lag else None,
+        'updates': summarize(update_times, elapsed) if update_times else None,
+        'handlers': summarize_handlers(main.HANDLER_SECONDS, elapsed),
+        'bot_api_calls': dict(sorted(request.counts.items())),
+    }
+
+
+def run_replay():
+    args = parse_args()
+    records = read_log(args.log, args.limit)
+    if not records:
+        print(f"No updates in {args.log}", file=sys.stderr)
+        return 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Копия базы: повторные прогоны стартуют из одного и того же состояния
+        db_path = os.path.join(tmp, 'shop.db')
+        if os.path.exists(args.db):
+            shutil.copyfile(args.db, db_path)
+        os.environ['SHOP_DB'] = db_path
+        if args.database_url:
+            os.environ['DATABASE_URL'] = args.database_url
+        if args.speed != 1:
+            # Лимитер флуда считает реальное время: в сжатом темпе он отклонял бы то, что в записи прошло
+            os.environ.setdefault('FLOOD_USER_RATE', '0')
+        # Обработка фото в замер не входит: пул процессов и скачивание фото по URL шли бы фоном
+        os.environ['IMAGE_WORKERS'] = '0'
+        import logging
+        logging.disable(logging.INFO)
+
+        import main
+        main.init_db()
+        if args.database_url:
+            from migrate_to_postgres import copy_database
+            asyncio.run(copy_database(db_path, args.database_url, replace=True))
+        report = asyncio.run(replay(args, records))
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(run_replay())